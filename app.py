@@ -2,13 +2,46 @@
 """
 MegaNames (.mega) Web Checker
 Flask backend serving the multi-name availability checker.
+
+Run with gevent workers in production: gunicorn -k gevent -w 4 app:app
 """
 
+try:
+    # Must happen before anything imports socket/ssl so gevent can
+    # cooperatively schedule the concurrent RPC round trips.
+    from gevent import monkey
+    monkey.patch_all()
+    _HAS_GEVENT = True
+except ImportError:
+    _HAS_GEVENT = False
+
+import os
 import re
 import time
-from flask import Flask, render_template, jsonify, request
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import threading
+import httpx
+import orjson
+from cachetools import TTLCache
+from flask import Flask, render_template, jsonify, request, stream_with_context
 from web3 import Web3
-from eth_abi import decode as abi_decode, encode as abi_encode
+
+try:
+    # C-compiled drop-in for eth-abi; same API, several times faster
+    from faster_eth_abi import decode as abi_decode, encode as abi_encode
+except ImportError:
+    from eth_abi import decode as abi_decode, encode as abi_encode
+
+try:
+    # pycryptodome's C keccak is much faster than the default eth-hash backend
+    from Crypto.Hash import keccak as _crypto_keccak
+
+    def _keccak(data):
+        return _crypto_keccak.new(digest_bits=256, data=data).digest()
+except ImportError:
+    def _keccak(data):
+        return bytes(Web3.keccak(data))
 
 # ═══════════════════════════════════════════════════════════════
 #  Configuration
@@ -19,14 +52,39 @@ NAMES_ADDR = "0x5B424C6CCba77b32b9625a6fd5A30D409d20d997"
 MC3_ADDR   = "0xcA11bde05977b3631167028862bE2a173976CA11"
 BATCH_SIZE = 80
 
+# Optional thin reader contract: check(uint256[]) -> (uint64 expiresAt, address owner)[].
+# One tokenId word per label instead of two full aggregate3 sub-calls (~32 vs
+# ~200 bytes of calldata per label). Nothing is deployed by default; set the
+# env var to a deployed reader to enable it. aggregate3 remains the fallback.
+BATCH_READER_ADDR = os.environ.get("BATCH_READER_ADDR")
+
 MEGA_NODE = bytes.fromhex(
     "892fab39f6d2ae901009febba7dbdd0fd85e8a1651be6b8901774cdef395852f"
 )
 GRACE_PERIOD = 90 * 86400
 
+# (available, status) indexed by (now > expires_at) + (now > expires_at + GRACE_PERIOD)
+_EXPIRY_STATES = ((False, "taken"), (False, "grace"), (True, "expired"))
+
 PRICING = {1: 1000, 2: 500, 3: 100, 4: 10}
 DEFAULT_PRICE = 1
 
+# Precomputed address constants — checksumming and building the zero-address
+# string are not free, so do them once at import
+TARGET    = Web3.to_checksum_address(NAMES_ADDR)
+ZERO_ADDR = "0x" + "0" * 40
+_ZERO_20  = b"\x00" * 20
+
+# 4-byte function selectors (constant — hash once at import, not per call)
+RECORDS_SEL    = Web3.keccak(text="records(uint256)")[:4]
+OWNER_SEL      = Web3.keccak(text="ownerOf(uint256)")[:4]
+AGGREGATE3_SEL = Web3.keccak(text="aggregate3((address,bool,bytes)[])")[:4]
+BATCH_CHECK_SEL = Web3.keccak(text="check(uint256[])")[:4]
+
+# Precompiled patterns for the hot validation/split paths
+_LABEL_RE = re.compile(r"^[a-z0-9-]+\Z")
+_SPLIT_RE = re.compile(r"[,\s]+")
+
 # ═══════════════════════════════════════════════════════════════
 #  Flask App
 # ═══════════════════════════════════════════════════════════════
@@ -39,7 +97,6 @@ app = Flask(__name__)
 
 _w3 = None
 _meganames = None
-_multicall = None
 
 MEGANAMES_ABI = [
     {
@@ -60,39 +117,14 @@ MEGANAMES_ABI = [
     },
 ]
 
-MULTICALL3_ABI = [
-    {
-        "type": "function", "name": "aggregate3", "stateMutability": "payable",
-        "inputs": [{
-            "name": "calls", "type": "tuple[]",
-            "components": [
-                {"name": "target", "type": "address"},
-                {"name": "allowFailure", "type": "bool"},
-                {"name": "callData", "type": "bytes"},
-            ],
-        }],
-        "outputs": [{
-            "name": "returnData", "type": "tuple[]",
-            "components": [
-                {"name": "success", "type": "bool"},
-                {"name": "returnData", "type": "bytes"},
-            ],
-        }],
-    }
-]
-
-
 def get_w3():
-    global _w3, _meganames, _multicall
+    """Lazy web3 setup — only the MegaNames contract is kept, and only for
+    the individual-call fallback; the hot path speaks raw JSON-RPC."""
+    global _w3, _meganames
     if _w3 is None:
         _w3 = Web3(Web3.HTTPProvider(RPC_URL, request_kwargs={"timeout": 30}))
-        _meganames = _w3.eth.contract(
-            address=Web3.to_checksum_address(NAMES_ADDR), abi=MEGANAMES_ABI
-        )
-        _multicall = _w3.eth.contract(
-            address=Web3.to_checksum_address(MC3_ADDR), abi=MULTICALL3_ABI
-        )
-    return _w3, _meganames, _multicall
+        _meganames = _w3.eth.contract(address=TARGET, abi=MEGANAMES_ABI)
+    return _w3, _meganames
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -112,134 +144,251 @@ def validate_label(raw):
         return None, "Empty name"
     if len(name) > 255:
         return None, "Too long (max 255 chars)"
-    if not re.match(r"^[a-z0-9-]+$", name):
+    if not _LABEL_RE.match(name):
         return None, "Invalid characters (only a-z, 0-9, hyphen)"
     if name[0] == "-" or name[-1] == "-":
         return None, "Cannot start or end with hyphen"
     return name, None
 
 
+@lru_cache(maxsize=65536)
 def compute_token_id(label):
-    label_hash = Web3.keccak(label.encode("utf-8"))
-    return int.from_bytes(Web3.keccak(MEGA_NODE + label_hash), "big")
+    return int.from_bytes(_keccak(MEGA_NODE + _keccak(label.encode("utf-8"))), "big")
+
+
+def compute_token_ids(labels):
+    """Token ids for a whole batch in one tight loop. The callable is bound
+    locally so the loop body skips global lookups; repeated labels still hit
+    the LRU cache on compute_token_id."""
+    tid = compute_token_id
+    return [tid(label) for label in labels]
+
 
+@lru_cache(maxsize=4096)
+def _format_date(ts):
+    """Unix timestamp → YYYY-MM-DD, memoized. Only run when building the
+    response — the hot loops store just the raw expiry int."""
+    return time.strftime("%Y-%m-%d", time.gmtime(ts))
 
-def encode_call(sig, types, values):
-    selector = Web3.keccak(text=sig)[:4]
-    return selector + abi_encode(types, values)
+
+def _decode_record(rec_data):
+    """Decode a records() return blob to (has_label, expires_at).
+
+    The head layout is fixed — word 0 is the string offset, word 2 is
+    expiresAt — so when the offset is the standard 0xa0 we can slice the
+    fields directly instead of running the generic ABI decoder. Falls back
+    to abi_decode for anything unusual.
+    """
+    if int.from_bytes(rec_data[:32], "big") == 0xA0 and len(rec_data) >= 192:
+        has_label = int.from_bytes(rec_data[160:192], "big") != 0
+        return has_label, int.from_bytes(rec_data[88:96], "big")
+    stored_label, _parent, expires_at, _epoch, _p_epoch = abi_decode(
+        ["string", "uint256", "uint64", "uint64", "uint64"], rec_data
+    )
+    return bool(stored_label), expires_at
 
 
 # ═══════════════════════════════════════════════════════════════
 #  Batch Checker
 # ═══════════════════════════════════════════════════════════════
 
-def check_names(labels):
-    w3, meganames, multicall = get_w3()
+# Result rows share one shape; copying a template is cheaper than rebuilding
+# a 10-key dict literal per label.
+_RESULT_TEMPLATE = {
+    "name": "",
+    "display": "",
+    "available": True,
+    "status": "available",
+    "owner": None,
+    "expires": 0,
+    "expires_date": None,
+    "price": 0,
+    "length": 0,
+}
+
+
+def _new_result(label):
+    info = _RESULT_TEMPLATE.copy()
+    info["name"] = label
+    info["display"] = label + ".mega"
+    info["price"] = price_usd(len(label))
+    info["length"] = len(label)
+    return info
+
+
+# Pooled HTTP/2 client for raw JSON-RPC — keeps TLS connections alive across
+# batches, and concurrent batches can multiplex one connection instead of each
+# paying a fresh TLS handshake. Falls back to HTTP/1.1 if the endpoint doesn't
+# negotiate h2.
+_rpc_client = httpx.Client(
+    http2=True,
+    timeout=30,
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+)
+
+
+def _eth_call(to, calldata):
+    """Raw eth_call via the pooled client. Returns the result bytes."""
+    resp = _rpc_client.post(
+        RPC_URL,
+        content=orjson.dumps({
+            "jsonrpc": "2.0",
+            "method": "eth_call",
+            "params": [{"to": to, "data": "0x" + calldata.hex()}, "latest"],
+            "id": 1,
+        }),
+        headers={"Content-Type": "application/json"},
+    )
+    resp.raise_for_status()
+    body = orjson.loads(resp.content)
+    if "error" in body:
+        raise RuntimeError(f"eth_call failed: {body['error']}")
+    return bytes.fromhex(body["result"][2:])
+
+
+def _aggregate3(calls):
+    """Multicall3 aggregate3 via a raw eth_call, bypassing web3.py's
+    contract/formatter stack. Returns the same [(success, returnData), ...]
+    shape as the contract wrapper."""
+    calldata = AGGREGATE3_SEL + abi_encode(["(address,bool,bytes)[]"], [calls])
+    (decoded,) = abi_decode(["(bool,bytes)[]"], _eth_call(MC3_ADDR, calldata))
+    return decoded
+
+
+# Concurrent multicall batches — each one is a single HTTPS round trip, so
+# firing them together collapses total wall time to roughly one RTT.
+_executor = ThreadPoolExecutor(max_workers=8)
+
+# Short-lived per-label result cache. Availability moves on a scale of days,
+# so re-checks within a minute can skip the RPC entirely.
+_result_cache = TTLCache(maxsize=100_000, ttl=60)
+_cache_lock = threading.Lock()
+
+
+def iter_check_names(labels):
+    """Yield one result row per label, in input order, as results arrive.
+
+    Cached labels are served immediately; the rest are fanned out to the
+    executor one multicall batch per task, and each row is yielded as soon
+    as its batch has resolved instead of waiting for the whole set.
+    """
+    w3, meganames = get_w3()
     now = int(time.time())
-    target = Web3.to_checksum_address(NAMES_ADDR)
 
-    all_results = []
+    by_label = {}
+    uncached = []
+    with _cache_lock:
+        for label in labels:
+            hit = _result_cache.get(label)
+            if hit is not None:
+                by_label[label] = dict(hit)  # copy so callers can't mutate the cache
+            else:
+                uncached.append(label)
+
+    batches = [uncached[i:i + BATCH_SIZE] for i in range(0, len(uncached), BATCH_SIZE)]
+    futures = [
+        _executor.submit(_check_batch, w3, meganames, batch, now)
+        for batch in batches
+    ]
+
+    resolved = 0  # futures folded into by_label so far
+    for label in labels:
+        while label not in by_label:
+            fetched = futures[resolved].result()
+            resolved += 1
+            with _cache_lock:
+                for info in fetched:
+                    _result_cache[info["name"]] = dict(info)
+                    by_label[info["name"]] = info
+        yield by_label[label]
+
+
+def check_names(labels):
+    return list(iter_check_names(labels))
 
-    for batch_start in range(0, len(labels), BATCH_SIZE):
-        batch = labels[batch_start:batch_start + BATCH_SIZE]
 
-        calls = []
-        token_ids = []
+def _check_batch_reader(batch, now):
+    """Compact path through an on-chain batch reader: one tokenId word per
+    label in, one (expiresAt, owner) tuple per label out."""
+    calldata = BATCH_CHECK_SEL + abi_encode(["uint256[]"], [compute_token_ids(batch)])
+    (decoded,) = abi_decode(["(uint64,address)[]"], _eth_call(BATCH_READER_ADDR, calldata))
+
+    results = []
+    for label, (expires_at, owner) in zip(batch, decoded):
+        info = _new_result(label)
+        if expires_at:  # zero means never registered
+            info["expires"] = expires_at
+            state = (now > expires_at) + (now > expires_at + GRACE_PERIOD)
+            info["available"], info["status"] = _EXPIRY_STATES[state]
+        if owner != ZERO_ADDR:
+            info["owner"] = owner
+        results.append(info)
+    return results
 
-        for label in batch:
-            tid = compute_token_id(label)
-            token_ids.append(tid)
-            calls.append((target, True, encode_call("records(uint256)", ["uint256"], [tid])))
-            calls.append((target, True, encode_call("ownerOf(uint256)", ["uint256"], [tid])))
 
+def _check_batch(w3, meganames, batch, now):
+    if BATCH_READER_ADDR:
         try:
-            raw = multicall.functions.aggregate3(calls).call()
-        except Exception as e:
-            # Fallback to individual calls
-            for label in batch:
-                all_results.append(_check_single(w3, meganames, label, now))
-            continue
-
-        for i, label in enumerate(batch):
-            rec_ok, rec_data = raw[i * 2]
-            own_ok, own_data = raw[i * 2 + 1]
-
-            info = {
-                "name": label,
-                "display": f"{label}.mega",
-                "available": True,
-                "status": "available",
-                "owner": None,
-                "expires": 0,
-                "expires_date": None,
-                "price": price_usd(len(label)),
-                "length": len(label),
-            }
-
-            if rec_ok and len(rec_data) >= 160:
-                try:
-                    stored_label, parent, expires_at, epoch, p_epoch = abi_decode(
-                        ["string", "uint256", "uint64", "uint64", "uint64"], rec_data
-                    )
-                    if stored_label:
-                        info["expires"] = expires_at
-                        info["expires_date"] = time.strftime("%Y-%m-%d", time.gmtime(expires_at))
-                        if now <= expires_at:
-                            info["available"] = False
-                            info["status"] = "taken"
-                        elif now <= expires_at + GRACE_PERIOD:
-                            info["available"] = False
-                            info["status"] = "grace"
-                        else:
-                            info["status"] = "expired"
-                except Exception:
-                    pass
-
-            if own_ok and len(own_data) >= 32:
-                try:
-                    (addr,) = abi_decode(["address"], own_data)
-                    if addr != "0x" + "0" * 40:
-                        info["owner"] = addr
-                except Exception:
-                    pass
-
-            all_results.append(info)
-
-    return all_results
+            return _check_batch_reader(batch, now)
+        except Exception:
+            pass  # reader unavailable — fall through to aggregate3
+
+    # Preallocated — two fixed slots per label, no list growth in the loop
+    calls = [None] * (2 * len(batch))
+    for i, tid in enumerate(compute_token_ids(batch)):
+        tid_bytes = tid.to_bytes(32, "big")
+        calls[2 * i] = (TARGET, True, RECORDS_SEL + tid_bytes)
+        calls[2 * i + 1] = (TARGET, True, OWNER_SEL + tid_bytes)
+
+    try:
+        raw = _aggregate3(calls)
+    except Exception:
+        # Fallback to individual calls for this batch only
+        return [_check_single(w3, meganames, label, now) for label in batch]
+
+    results = []
+    # Single pass over the return data: pairing one iterator with itself
+    # walks (records, ownerOf) per label without index arithmetic
+    pairs = iter(raw)
+    for label, (rec_ok, rec_data), (own_ok, own_data) in zip(batch, pairs, pairs):
+        info = _new_result(label)
+
+        if rec_ok and len(rec_data) >= 160:
+            try:
+                has_label, expires_at = _decode_record(rec_data)
+                if has_label:
+                    info["expires"] = expires_at
+                    state = (now > expires_at) + (now > expires_at + GRACE_PERIOD)
+                    info["available"], info["status"] = _EXPIRY_STATES[state]
+            except Exception:
+                pass
+
+        if own_ok and len(own_data) >= 32:
+            # ownerOf returns one 32-byte word: the address in the last 20 bytes
+            addr_bytes = own_data[-20:]
+            if addr_bytes != _ZERO_20:
+                info["owner"] = "0x" + addr_bytes.hex()
+
+        results.append(info)
+
+    return results
 
 
 def _check_single(w3, meganames, label, now):
     tid = compute_token_id(label)
-    info = {
-        "name": label,
-        "display": f"{label}.mega",
-        "available": True,
-        "status": "available",
-        "owner": None,
-        "expires": 0,
-        "expires_date": None,
-        "price": price_usd(len(label)),
-        "length": len(label),
-    }
+    info = _new_result(label)
     try:
         rec = meganames.functions.records(tid).call()
         stored_label, parent, expires_at, epoch, p_epoch = rec
         if stored_label:
             info["expires"] = expires_at
-            info["expires_date"] = time.strftime("%Y-%m-%d", time.gmtime(expires_at))
-            if now <= expires_at:
-                info["available"] = False
-                info["status"] = "taken"
-            elif now <= expires_at + GRACE_PERIOD:
-                info["available"] = False
-                info["status"] = "grace"
-            else:
-                info["status"] = "expired"
+            state = (now > expires_at) + (now > expires_at + GRACE_PERIOD)
+            info["available"], info["status"] = _EXPIRY_STATES[state]
     except Exception:
         pass
     try:
         owner = meganames.functions.ownerOf(tid).call()
-        if owner != "0x" + "0" * 40:
+        if owner != ZERO_ADDR:
             info["owner"] = owner
     except Exception:
         pass
@@ -250,6 +399,11 @@ def _check_single(w3, meganames, label, now):
 #  Routes
 # ═══════════════════════════════════════════════════════════════
 
+def _json_response(payload, status=200):
+    """orjson-encoded JSON response — much faster than jsonify for big payloads."""
+    return app.response_class(orjson.dumps(payload), status=status, mimetype="application/json")
+
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -257,24 +411,26 @@ def index():
 
 @app.route("/api/check", methods=["POST"])
 def api_check():
-    data = request.get_json()
-    if not data or "names" not in data:
-        return jsonify({"error": "Missing 'names' field"}), 400
+    try:
+        data = orjson.loads(request.get_data())
+    except orjson.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict) or "names" not in data:
+        return _json_response({"error": "Missing 'names' field"}, 400)
 
     raw_names = data["names"]
     if isinstance(raw_names, str):
-        raw_names = [n for n in re.split(r"[,\s]+", raw_names.strip()) if n]
+        raw_names = [n for n in _SPLIT_RE.split(raw_names.strip()) if n]
 
     if not raw_names:
-        return jsonify({"error": "No names provided"}), 400
+        return _json_response({"error": "No names provided"}, 400)
 
     if len(raw_names) > 500:
-        return jsonify({"error": "Maximum 500 names per request"}), 400
+        return _json_response({"error": "Maximum 500 names per request"}, 400)
 
-    # Validate & deduplicate
-    valid = []
+    # Validate & deduplicate (dict keeps insertion order, one membership probe)
+    valid = {}
     invalid = []
-    seen = set()
 
     for raw in raw_names:
         label, err = validate_label(raw)
@@ -294,40 +450,52 @@ def api_check():
                 "price": 0,
                 "length": 0,
             })
-        elif label not in seen:
-            seen.add(label)
-            valid.append(label)
-
-    # Check valid names on-chain
-    start = time.time()
-    results = check_names(valid) if valid else []
-    elapsed = round(time.time() - start, 2)
-
-    all_results = invalid + results
-
-    # Summary stats
-    available_count = sum(1 for r in all_results if r.get("available") and r.get("status") != "invalid")
-    taken_count = sum(1 for r in all_results if not r.get("available") and r.get("status") not in ("invalid",))
-    invalid_count = len(invalid)
-    total_cost = sum(r["price"] for r in all_results if r.get("available"))
-
-    return jsonify({
-        "results": all_results,
-        "summary": {
-            "total": len(all_results),
-            "available": available_count,
-            "taken": taken_count,
-            "invalid": invalid_count,
-            "total_cost_year": total_cost,
-            "elapsed_seconds": elapsed,
-        },
-    })
+        else:
+            valid[label] = None
+
+    valid = list(valid)
+
+    # Stream one NDJSON line per result as batches resolve, summary last —
+    # the browser renders first rows after one round trip instead of waiting
+    # for the whole set, and nothing is held in memory twice.
+    def _generate():
+        start = time.time()
+        available_count = taken_count = 0
+        total_cost = 0
+
+        for r in invalid:
+            yield orjson.dumps(r) + b"\n"
+
+        for r in iter_check_names(valid):
+            if r["expires"]:
+                r["expires_date"] = _format_date(r["expires"])
+            if r["available"]:
+                available_count += 1
+                total_cost += r["price"]
+            else:
+                taken_count += 1
+            yield orjson.dumps(r) + b"\n"
+
+        yield orjson.dumps({
+            "summary": {
+                "total": len(invalid) + len(valid),
+                "available": available_count,
+                "taken": taken_count,
+                "invalid": len(invalid),
+                "total_cost_year": total_cost,
+                "elapsed_seconds": round(time.time() - start, 2),
+            },
+        }) + b"\n"
+
+    return app.response_class(
+        stream_with_context(_generate()), mimetype="application/x-ndjson"
+    )
 
 
 @app.route("/api/health")
 def health():
     try:
-        w3, _, _ = get_w3()
+        w3, _ = get_w3()
         connected = w3.is_connected()
         block = w3.eth.block_number if connected else 0
         return jsonify({"status": "ok", "connected": connected, "block": block})
@@ -343,4 +511,9 @@ if __name__ == "__main__":
     import os
     port = int(os.environ.get("PORT", 3000))
     print(f"\n  MegaNames Checker running at http://localhost:{port}\n")
-    app.run(host="0.0.0.0", port=port, debug=False)
+    if _HAS_GEVENT:
+        from gevent.pywsgi import WSGIServer
+        WSGIServer(("0.0.0.0", port), app).serve_forever()
+    else:
+        # Werkzeug dev server — single-threaded, local testing only
+        app.run(host="0.0.0.0", port=port, debug=False)
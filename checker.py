@@ -18,9 +18,25 @@ import re
 import time
 import json
 import argparse
+from functools import lru_cache
 
 from web3 import Web3
-from eth_abi import decode as abi_decode, encode as abi_encode
+
+try:
+    # C-compiled drop-in for eth-abi; same API, several times faster
+    from faster_eth_abi import decode as abi_decode, encode as abi_encode
+except ImportError:
+    from eth_abi import decode as abi_decode, encode as abi_encode
+
+try:
+    # pycryptodome's C keccak is much faster than the default eth-hash backend
+    from Crypto.Hash import keccak as _crypto_keccak
+
+    def _keccak(data):
+        return _crypto_keccak.new(digest_bits=256, data=data).digest()
+except ImportError:
+    def _keccak(data):
+        return bytes(Web3.keccak(data))
 
 # ═══════════════════════════════════════════════════════════════════
 #  Configuration
@@ -37,10 +53,28 @@ MEGA_NODE = bytes.fromhex(
 )
 GRACE_PERIOD = 90 * 86400  # 90 days in seconds
 
+# (available, status) indexed by (now > expires_at) + (now > expires_at + GRACE_PERIOD)
+_EXPIRY_STATES = ((False, "taken"), (False, "grace"), (True, "expired"))
+
+# Precompiled patterns for validation/splitting
+_LABEL_RE = re.compile(r"^[a-z0-9-]+\Z")
+_SPLIT_RE = re.compile(r"[,\s]+")
+
 # Pricing: annual USD per character length
 PRICING = {1: 1000, 2: 500, 3: 100, 4: 10}
 DEFAULT_PRICE = 1  # $1/yr for 5+ chars
 
+# Precomputed address constants — checksumming and building the zero-address
+# string are not free, so do them once at import
+TARGET    = Web3.to_checksum_address(NAMES_ADDR)
+ZERO_ADDR = "0x" + "0" * 40
+_ZERO_20  = b"\x00" * 20
+
+# 4-byte function selectors (constant — hash once at import, not per call)
+RECORDS_SEL    = Web3.keccak(text="records(uint256)")[:4]
+OWNER_SEL      = Web3.keccak(text="ownerOf(uint256)")[:4]
+AGGREGATE3_SEL = Web3.keccak(text="aggregate3((address,bool,bytes)[])")[:4]
+
 # ═══════════════════════════════════════════════════════════════════
 #  Terminal Colors (auto-disabled when piped / NO_COLOR set)
 # ═══════════════════════════════════════════════════════════════════
@@ -85,35 +119,6 @@ MEGANAMES_ABI = [
     },
 ]
 
-MULTICALL3_ABI = [
-    {
-        "type": "function",
-        "name": "aggregate3",
-        "stateMutability": "payable",
-        "inputs": [
-            {
-                "name": "calls",
-                "type": "tuple[]",
-                "components": [
-                    {"name": "target", "type": "address"},
-                    {"name": "allowFailure", "type": "bool"},
-                    {"name": "callData", "type": "bytes"},
-                ],
-            }
-        ],
-        "outputs": [
-            {
-                "name": "returnData",
-                "type": "tuple[]",
-                "components": [
-                    {"name": "success", "type": "bool"},
-                    {"name": "returnData", "type": "bytes"},
-                ],
-            }
-        ],
-    }
-]
-
 # ═══════════════════════════════════════════════════════════════════
 #  Helpers
 # ═══════════════════════════════════════════════════════════════════
@@ -135,22 +140,47 @@ def validate_label(raw):
         return None, "empty name"
     if len(name) > 255:
         return None, "too long (max 255 chars)"
-    if not re.match(r"^[a-z0-9-]+$", name):
+    if not _LABEL_RE.match(name):
         return None, "invalid chars (only a-z, 0-9, hyphen)"
     if name[0] == "-" or name[-1] == "-":
         return None, "no leading/trailing hyphens"
     return name, None
 
 
+@lru_cache(maxsize=65536)
 def compute_token_id(label):
     """Compute tokenId = uint256(keccak256(MEGA_NODE || keccak256(label)))."""
-    label_hash = Web3.keccak(label.encode("utf-8"))
-    return int.from_bytes(Web3.keccak(MEGA_NODE + label_hash), "big")
+    return int.from_bytes(_keccak(MEGA_NODE + _keccak(label.encode("utf-8"))), "big")
+
+
+def compute_token_ids(labels):
+    """Token ids for a whole batch in one tight loop. The callable is bound
+    locally so the loop body skips global lookups; repeated labels still hit
+    the LRU cache on compute_token_id."""
+    tid = compute_token_id
+    return [tid(label) for label in labels]
+
+
+def _decode_record(rec_data):
+    """Decode a records() return blob to (has_label, expires_at).
+
+    The head layout is fixed — word 0 is the string offset, word 2 is
+    expiresAt — so when the offset is the standard 0xa0 we can slice the
+    fields directly instead of running the generic ABI decoder. Falls back
+    to abi_decode for anything unusual.
+    """
+    if int.from_bytes(rec_data[:32], "big") == 0xA0 and len(rec_data) >= 192:
+        has_label = int.from_bytes(rec_data[160:192], "big") != 0
+        return has_label, int.from_bytes(rec_data[88:96], "big")
+    stored_label, _parent, expires_at, _epoch, _p_epoch = abi_decode(
+        ["string", "uint256", "uint64", "uint64", "uint64"], rec_data
+    )
+    return bool(stored_label), expires_at
 
 
 def short_addr(addr):
     """0x1234...5678"""
-    if not addr or addr == "0x" + "0" * 40:
+    if not addr or addr == ZERO_ADDR:
         return ""
     return f"{addr[:6]}...{addr[-4:]}"
 
@@ -164,84 +194,82 @@ def ts_to_date(ts):
 #  Core Checker (Multicall3 batched)
 # ═══════════════════════════════════════════════════════════════════
 
-def _encode_call(selector_text, args_types, args_values):
-    """Manually encode a contract call: selector + abi_encode(args)."""
-    selector = Web3.keccak(text=selector_text)[:4]
-    return selector + abi_encode(args_types, args_values)
+# Result rows share one shape; copying a template is cheaper than rebuilding
+# the dict literal per label.
+_RESULT_TEMPLATE = {
+    "name": "",
+    "token_id": 0,
+    "available": True,
+    "status": "available",
+    "owner": None,
+    "expires": 0,
+    "price": 0,
+}
+
+
+def _new_result(label, tid):
+    info = _RESULT_TEMPLATE.copy()
+    info["name"] = label
+    info["token_id"] = tid  # int; rendered as hex only on JSON output
+    info["price"] = price_usd(len(label))
+    return info
 
 
-def check_batch(w3, meganames, multicall, labels):
+def check_batch(w3, meganames, labels):
     """Check a batch of labels using Multicall3.
 
     For each label, 2 sub-calls are batched:
       1. records(tokenId)  – registration data
       2. ownerOf(tokenId)  – current owner (may fail if unregistered)
 
+    The aggregate3 call is encoded directly (precomputed selector +
+    eth_abi) rather than going through a web3 Contract object.
+
     Returns list of result dicts.
     """
     now = int(time.time())
-    target = Web3.to_checksum_address(NAMES_ADDR)
 
-    calls = []
-    token_ids = []
+    token_ids = compute_token_ids(labels)
 
-    for label in labels:
-        tid = compute_token_id(label)
-        token_ids.append(tid)
+    # Preallocated — two fixed slots per label, no list growth in the loop
+    calls = [None] * (2 * len(labels))
+    for i, tid in enumerate(token_ids):
+        tid_bytes = tid.to_bytes(32, "big")
 
-        # records(tokenId)
-        rec_cd = _encode_call("records(uint256)", ["uint256"], [tid])
-        calls.append((target, True, rec_cd))
-
-        # ownerOf(tokenId)
-        own_cd = _encode_call("ownerOf(uint256)", ["uint256"], [tid])
-        calls.append((target, True, own_cd))
+        # records(tokenId) / ownerOf(tokenId)
+        calls[2 * i] = (TARGET, True, RECORDS_SEL + tid_bytes)
+        calls[2 * i + 1] = (TARGET, True, OWNER_SEL + tid_bytes)
 
     # Single RPC call for entire batch
-    raw = multicall.functions.aggregate3(calls).call()
+    calldata = AGGREGATE3_SEL + abi_encode(["(address,bool,bytes)[]"], [calls])
+    ret = w3.eth.call({"to": MC3_ADDR, "data": calldata})
+    (raw,) = abi_decode(["(bool,bytes)[]"], bytes(ret))
 
     results = []
-    for i, label in enumerate(labels):
-        rec_ok, rec_data = raw[i * 2]
-        own_ok, own_data = raw[i * 2 + 1]
-
-        info = {
-            "name": label,
-            "token_id": hex(token_ids[i]),
-            "available": True,
-            "status": "available",
-            "owner": None,
-            "expires": 0,
-            "price": price_usd(len(label)),
-        }
+    # Single pass over the return data: pairing one iterator with itself
+    # walks (records, ownerOf) per label without index arithmetic
+    pairs = iter(raw)
+    for label, tid, (rec_ok, rec_data), (own_ok, own_data) in zip(
+        labels, token_ids, pairs, pairs
+    ):
+        info = _new_result(label, tid)
 
         # Parse records()
         if rec_ok and len(rec_data) >= 160:
             try:
-                stored_label, parent, expires_at, epoch, p_epoch = abi_decode(
-                    ["string", "uint256", "uint64", "uint64", "uint64"], rec_data
-                )
-                if stored_label:  # record exists
+                has_label, expires_at = _decode_record(rec_data)
+                if has_label:  # record exists
                     info["expires"] = expires_at
-                    if now <= expires_at:
-                        info["available"] = False
-                        info["status"] = "taken"
-                    elif now <= expires_at + GRACE_PERIOD:
-                        info["available"] = False
-                        info["status"] = "grace"
-                    else:
-                        info["status"] = "expired"  # re-registerable
+                    state = (now > expires_at) + (now > expires_at + GRACE_PERIOD)
+                    info["available"], info["status"] = _EXPIRY_STATES[state]
             except Exception:
                 pass
 
-        # Parse ownerOf()
+        # Parse ownerOf() — one 32-byte word, address in the last 20 bytes
         if own_ok and len(own_data) >= 32:
-            try:
-                (addr,) = abi_decode(["address"], own_data)
-                if addr != "0x" + "0" * 40:
-                    info["owner"] = addr
-            except Exception:
-                pass
+            addr_bytes = own_data[-20:]
+            if addr_bytes != _ZERO_20:
+                info["owner"] = "0x" + addr_bytes.hex()
 
         results.append(info)
 
@@ -252,35 +280,21 @@ def check_single(w3, meganames, label):
     """Fallback: check one name with individual RPC calls."""
     now = int(time.time())
     tid = compute_token_id(label)
-    info = {
-        "name": label,
-        "token_id": hex(tid),
-        "available": True,
-        "status": "available",
-        "owner": None,
-        "expires": 0,
-        "price": price_usd(len(label)),
-    }
+    info = _new_result(label, tid)
 
     try:
         rec = meganames.functions.records(tid).call()
         stored_label, parent, expires_at, epoch, p_epoch = rec
         if stored_label:
             info["expires"] = expires_at
-            if now <= expires_at:
-                info["available"] = False
-                info["status"] = "taken"
-            elif now <= expires_at + GRACE_PERIOD:
-                info["available"] = False
-                info["status"] = "grace"
-            else:
-                info["status"] = "expired"
+            state = (now > expires_at) + (now > expires_at + GRACE_PERIOD)
+            info["available"], info["status"] = _EXPIRY_STATES[state]
     except Exception:
         pass
 
     try:
         owner = meganames.functions.ownerOf(tid).call()
-        if owner != "0x" + "0" * 40:
+        if owner != ZERO_ADDR:
             info["owner"] = owner
     except Exception:
         pass
@@ -362,7 +376,7 @@ def print_summary(results):
 
 def split_names(text):
     """Split a string of names by commas, spaces, or newlines."""
-    return [n for n in re.split(r"[,\s]+", text.strip()) if n]
+    return [n for n in _SPLIT_RE.split(text.strip()) if n]
 
 
 def collect_names(args):
@@ -505,13 +519,9 @@ Examples:
         sys.exit(1)
 
     meganames = w3.eth.contract(
-        address=Web3.to_checksum_address(NAMES_ADDR),
+        address=TARGET,
         abi=MEGANAMES_ABI,
     )
-    multicall = w3.eth.contract(
-        address=Web3.to_checksum_address(MC3_ADDR),
-        abi=MULTICALL3_ABI,
-    )
 
     # ── Check names in batches ────────────────────────────────
     checked = []
@@ -525,7 +535,7 @@ Examples:
             print(f"  {DIM}[batch {i+1}-{end} of {len(valid_labels)}]{RST}")
 
         try:
-            batch_results = check_batch(w3, meganames, multicall, batch)
+            batch_results = check_batch(w3, meganames, batch)
             checked.extend(batch_results)
         except Exception as e:
             if not args.json:
@@ -565,7 +575,7 @@ Examples:
             if r.get("price") is not None:
                 item["price_usd_year"] = r["price"]
             if r.get("token_id"):
-                item["token_id"] = r["token_id"]
+                item["token_id"] = hex(r["token_id"])
             if r.get("error"):
                 item["error"] = r["error"]
             output.append(item)